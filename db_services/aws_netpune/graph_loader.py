@@ -1,6 +1,14 @@
-import json
+import asyncio
+import functools
+import importlib.util
+import logging
+import random
 import time
 from http import HTTPStatus
+from types import MappingProxyType
+
+import httpx
+import orjson
 
 from rplus_constants import IAMROLE_ID, LOAD_ID, PAYLOAD, OVERALLSTATUS, STATUS, LOAD_FAILED, LOAD_IN_QUEUE, \
     LOAD_COMPLETED
@@ -9,101 +17,233 @@ from rplus_utils.common.config import config
 from rplus_utils.db_services.aws_netpune.rest import Rest
 from rplus_utils.logger import Logging
 
+# httpx speaks http2 only with h2 package installed, the httpx[http2] extra
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@functools.lru_cache(maxsize=1)
+def _iam_arn():
+    return f"arn:aws:iam::{IAMROLE_ID}:role/NeptuneAccessS3"
+
+
+_BASE_PAYLOAD_CREATE = MappingProxyType(
+    {
+        "format": "csv",
+        "mode": "AUTO",
+        "iamRoleArn": _iam_arn(),
+        "region": config.region_name,
+        "failOnError": "FALSE",
+        "parallelism": "MEDIUM",
+        "queueRequest": "TRUE",
+        "updateSingleCardinalityProperties": "FALSE",
+    }
+)
+
+_BASE_PAYLOAD_UPSERT = MappingProxyType(
+    {
+        "format": "csv",
+        "mode": "AUTO",
+        "iamRoleArn": _iam_arn(),
+        "region": config.region_name,
+        "failOnError": "FALSE",
+        "parallelism": "MEDIUM",
+        "updateSingleCardinalityProperties": "TRUE",
+    }
+)
+
+
+def _json(resp):
+    """Parse response body with orjson, skip requests encoding detection
+    :param resp: requests response
+    :return: parsed json body
+    """
+    return orjson.loads(resp.content)
+
+
+def _log_status(response, error=False):
+    """Log neptune status response, serialization only happen when the level is enabled
+    :param response: parsed neptune response
+    :param error: log as error instead of info
+    :return: None
+    """
+    if error:
+        Logging.error("status neptune -> {}".format(orjson.dumps(response).decode()))
+    elif Logging.is_enabled_for(logging.INFO):
+        Logging.info("status neptune -> {}".format(orjson.dumps(response).decode()))
+
+
+def _next_delay(attempt, deadline, base, cap, factor, jitter):
+    """Compute exponential backoff sleep with jitter, clipped to the deadline
+    :param attempt: number of attempts already done
+    :param deadline: monotonic deadline, None means no deadline
+    :return: sleep in seconds or None if the deadline is already reached
+    """
+    delay = min(cap, base * factor ** attempt) * (1 + random.uniform(-jitter, jitter))
+    if deadline is None:
+        return delay
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return None
+    return min(delay, remaining)
+
+
+def _poll_with_backoff(
+    rest, url, queue_id, terminal_states, limit=None, base=0.25, cap=30.0, factor=2.0, jitter=0.2
+):
+    """Poll neptune loader status until a terminal state or the deadline is reached
+    :param rest: rest client
+    :param url: graph loader url
+    :param queue_id: load id returned by neptune
+    :param terminal_states: statuses that stop the polling
+    :param limit: wall clock budget in seconds, None means wait until terminal state
+    :param base: first sleep in seconds
+    :param cap: maximum sleep in seconds
+    :param factor: multiplier applied to the sleep on every attempt
+    :param jitter: random +/- fraction applied to every sleep
+    :return: last status response from neptune
+    """
+    deadline = time.monotonic() + limit if limit is not None else None
+    temp_url = "{}/{}".format(url, queue_id)
+    attempt = 0
+    while True:
+        resp = rest.get(temp_url)
+        if resp.status_code != HTTPStatus.OK:
+            raise Exception("error fetching status neptune")
+
+        response = _json(resp)
+        _log_status(response)
+        if response[PAYLOAD][OVERALLSTATUS][STATUS] in terminal_states:
+            return response
+
+        delay = _next_delay(attempt, deadline, base, cap, factor, jitter)
+        if delay is None:
+            return response
+        attempt += 1
+        time.sleep(delay)
+
+
+TERMINAL_STATES = (LOAD_COMPLETED, LOAD_FAILED, LOAD_IN_QUEUE)
+
+
+def _submit_and_wait(key, url, single_cardinality, deadline_s=None):
+    """Submit neptune bulk load for s3 key and wait until it reach terminal state
+    :param key: s3 object key name
+    :param url: graph loader url
+    :param single_cardinality: update single cardinality properties (upsert) or not (create)
+    :param deadline_s: wall clock budget in seconds to wait for the load
+    :return: string load status
+    """
+    rest = Rest()
+    base_payload = _BASE_PAYLOAD_UPSERT if single_cardinality else _BASE_PAYLOAD_CREATE
+    # Dump to AN
+    payload = {**base_payload, "source": f"s3://{config.s3_bucket_name}/{key}"}
+    resp = rest.post(url, payload=payload)
+    if resp.status_code != HTTPStatus.OK:
+        raise Exception("Error to post neptune -> ", _json(resp))
+    queue_id = _json(resp)[PAYLOAD][LOAD_ID]
+
+    response = _poll_with_backoff(rest, url, queue_id, TERMINAL_STATES, limit=deadline_s)
+    status = response[PAYLOAD][OVERALLSTATUS][STATUS]
+    if status == LOAD_FAILED:
+        _log_status(response, error=True)
+    return status
+
+
+async def _poll_with_backoff_async(
+    client, url, queue_id, terminal_states, limit=None, base=0.25, cap=30.0, factor=2.0, jitter=0.2
+):
+    """Async version of _poll_with_backoff using httpx client"""
+    deadline = time.monotonic() + limit if limit is not None else None
+    temp_url = "{}/{}".format(url, queue_id)
+    attempt = 0
+    while True:
+        resp = await client.get(temp_url)
+        if resp.status_code != HTTPStatus.OK:
+            raise Exception("error fetching status neptune")
+
+        response = _json(resp)
+        _log_status(response)
+        if response[PAYLOAD][OVERALLSTATUS][STATUS] in terminal_states:
+            return response
+
+        delay = _next_delay(attempt, deadline, base, cap, factor, jitter)
+        if delay is None:
+            return response
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def _submit_and_wait_async(client, key, url, single_cardinality, deadline_s=None):
+    """Async version of _submit_and_wait using httpx client"""
+    base_payload = _BASE_PAYLOAD_UPSERT if single_cardinality else _BASE_PAYLOAD_CREATE
+    payload = {**base_payload, "source": f"s3://{config.s3_bucket_name}/{key}"}
+    resp = await client.post(url, json=payload)
+    if resp.status_code != HTTPStatus.OK:
+        raise Exception("Error to post neptune -> ", _json(resp))
+    queue_id = _json(resp)[PAYLOAD][LOAD_ID]
+
+    response = await _poll_with_backoff_async(
+        client, url, queue_id, TERMINAL_STATES, limit=deadline_s
+    )
+    status = response[PAYLOAD][OVERALLSTATUS][STATUS]
+    if status == LOAD_FAILED:
+        _log_status(response, error=True)
+    return status
+
 
 class GenerateNode:
 
     @staticmethod
     def create_node(limit=None, key=None, url=config.graph_loader_uri):
         """
-        :param limit:length of dataframe
+        :param limit: wall clock budget in seconds to wait for the load
         :param key: s3_object_name
         :param url: graph url
         :return: dump on graph
         """
-        rest = Rest()
-        # Dump to AN
-        payload = {
-            "source": "s3://{}/{}".format(config.s3_bucket_name, key),
-            "format": "csv",
-            "mode": "AUTO",
-            "iamRoleArn": "arn:aws:iam::{}:role/NeptuneAccessS3".format(IAMROLE_ID),
-            "region": config.region_name,
-            "failOnError": "FALSE",
-            "parallelism": "MEDIUM",
-            "queueRequest": "TRUE",
-            "updateSingleCardinalityProperties": "FALSE",
-        }
-        resp = rest.post(url, payload=payload)
-        time.sleep(2)
-        if resp.status_code != HTTPStatus.OK:
-            raise Exception("Error to post neptune -> ", resp.json())
-        response = resp.json()
-        queue_id = response[PAYLOAD][LOAD_ID]
-
-        for iteration in range(limit):
-            temp_url = "{}/{}".format(url, queue_id)
-            resp = rest.get(temp_url)
-            if resp.status_code != HTTPStatus.OK:
-                raise Exception("error fetching status neptune")
-
-            time.sleep(1)
-            response = resp.json()
-
-            Logging.info("status neptune -> {}".format(json.dumps(response)))
-            if response[PAYLOAD][OVERALLSTATUS][STATUS] not in [LOAD_COMPLETED, LOAD_FAILED, LOAD_IN_QUEUE]:
-                time.sleep(3)
-
-            else:
-                break
-
-        return response[PAYLOAD][OVERALLSTATUS][STATUS]
+        return _submit_and_wait(key, url, single_cardinality=False, deadline_s=limit)
 
     @staticmethod
     def upsert_node(limit=None, key=None, url=config.graph_loader_uri):
         """
-        :param limit:lenght of dataframe
+        :param limit: wall clock budget in seconds to wait for the load
         :param key: s3_object_key_name
         :param url: graph_loader
         :return: dump on s3
         """
+        return _submit_and_wait(key, url, single_cardinality=True, deadline_s=limit)
 
-        rest = Rest()
-        # Dump to AN
-        payload = {
-            "source": "s3://{}/{}".format(config.s3_bucket_name, key),
-            "format": "csv",
-            "mode": "AUTO",
-            "iamRoleArn": "arn:aws:iam::{}:role/NeptuneAccessS3".format(IAMROLE_ID),
-            "region": config.region_name,
-            "failOnError": "FALSE",
-            "parallelism": "MEDIUM",
-            "updateSingleCardinalityProperties": "TRUE",
-        }
-        resp = rest.post(url, payload=payload)
-        time.sleep(2)
-        if resp.status_code != HTTPStatus.OK:
-            raise Exception("Error to post neptune -> ", resp.json())
-        response = resp.json()
-        queue_id = response[PAYLOAD][LOAD_ID]
-
-        for iteration in range(limit):
-            temp_url = "{}/{}".format(url, queue_id)
-            resp = rest.get(temp_url)
-            if resp.status_code != HTTPStatus.OK:
-                raise Exception("error fetching status neptune")
-
-            time.sleep(1)
-            response = resp.json()
-
-            Logging.info("status neptune -> {}".format(json.dumps(response)))
-
-            if response[PAYLOAD][OVERALLSTATUS][STATUS] not in [LOAD_COMPLETED, LOAD_FAILED, LOAD_IN_QUEUE]:
-                time.sleep(3)
-
-            else:
-                if response[PAYLOAD][OVERALLSTATUS][STATUS] == LOAD_FAILED:
-                    Logging.error("status neptune -> {}".format(json.dumps(response)))
-                    break
-                break
-
-        return response[PAYLOAD][OVERALLSTATUS][STATUS]
+    @staticmethod
+    async def create_nodes_async(
+        keys, concurrency=8, limit=None, url=config.graph_loader_uri
+    ):
+        """Submit many loads concurrently and wait for all of them
+        :param keys: list of s3_object_name
+        :param concurrency: max loads in flight
+        :param limit: wall clock budget in seconds to wait for every load
+        :param url: graph url
+        :return: list of load status in the same order as keys, failed load has its
+            exception in place of the status
+        """
+        limits = httpx.Limits(
+            max_connections=concurrency * 2,
+            max_keepalive_connections=concurrency * 2,
+        )
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=limits) as client:
+
+            async def submit(key):
+                async with semaphore:
+                    return await _submit_and_wait_async(
+                        client, key, url, single_cardinality=False, deadline_s=limit
+                    )
+
+            # every load run to the end before the client is closed
+            results = await asyncio.gather(
+                *[submit(key) for key in keys], return_exceptions=True
+            )
+        for key, result in zip(keys, results):
+            if isinstance(result, BaseException):
+                Logging.error(f"load of {key} failed: {result!r}")
+        return results
@@ -1 +1,5 @@
-from rplus_utils.db_services.aws_s3.s3bucket import S3Services
+from rplus_utils.db_services.aws_s3.s3bucket import (
+    S3Services,
+    S3Error,
+    TransientS3Error,
+)
@@ -1,13 +1,30 @@
 import gzip
 import pickle
 from io import StringIO, BytesIO
+from typing import Optional, Union
 
 import boto3
+import pyarrow as pa
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from pandas import read_csv, DataFrame
+from pandas.io.parsers import TextFileReader
 
 from rplus_utils.common.config import config
 from rplus_utils.logger import Logging
 
+TRANSIENT_ERROR_CODES = {"SlowDown", "503", "Throttling"}
+
+
+class S3Error(RuntimeError):
+    pass
+
+
+class TransientS3Error(S3Error):
+    """S3 error that is safe to retry, eg: throttling or service unavailable"""
+
+    pass
+
 
 class S3Services:
     def __init__(
@@ -17,6 +34,9 @@ class S3Services:
     ):
         self.resource = boto_object
         self.bucket_name = bucket_name
+        # go through the low level client on the hot path, skip the resource factory
+        self.client = boto_object.meta.client
+        self.bucket = boto_object.Bucket(bucket_name)
 
     @classmethod
     def from_connection(
@@ -24,36 +44,60 @@ class S3Services:
         access_key: str = config.aws_access_key_id,
         secret_key: str = config.aws_secret_access_key,
         region_name: str = config.region_name,
+        max_pool: int = 50,
     ) -> "S3Services":
+        """Create s3 service from aws credentials
+        :param access_key: aws access key id
+        :param secret_key: aws secret access key
+        :param region_name: aws region name
+        :param max_pool: max http connections kept in the botocore pool
+        :return: S3Services object
+        """
+        cfg = Config(
+            max_pool_connections=max_pool,
+            retries={"max_attempts": 10, "mode": "adaptive"},
+            tcp_keepalive=True,
+        )
         try:
             conn = boto3.resource(
                 "s3",
                 aws_access_key_id=access_key,
                 aws_secret_access_key=secret_key,
                 region_name=region_name,
+                config=cfg,
             )
         except Exception as e:
-            raise "boto3 resource object creation failed {}".format(str(e))
+            raise S3Error(f"boto3 resource object creation failed: {e}") from e
         return cls(conn)
 
     def read_csv_from_s3(
-        self, object_name=None, bucket_name: str = config.s3_bucket_name
-    ) -> DataFrame:
+        self,
+        object_name=None,
+        bucket_name: str = config.s3_bucket_name,
+        chunksize: Optional[int] = None,
+    ) -> Union[DataFrame, TextFileReader]:
         """
         This function returns dataframe object of csv file stored in S3
         :param bucket_name: s3 bucket name
         :param object_name: Path of the object in S3
+        :param chunksize: if given, return an iterator of dataframes with this many rows each
         :return: dataframe object pandas
         """
         try:
-            content_object = self.resource.Object(bucket_name, object_name)
-            csv_string = content_object.get()["Body"].read().decode("utf-8")
-            df = read_csv(StringIO(csv_string))
+            body = self.client.get_object(Bucket=bucket_name, Key=object_name)["Body"]
+            # parse straight from the streaming body so download and parsing overlap
+            df = read_csv(body, encoding="utf-8", chunksize=chunksize)
             Logging.info("File {} has been read successfully".format(object_name))
             return df
 
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in TRANSIENT_ERROR_CODES:
+                raise TransientS3Error(
+                    f"Transient error while reading {bucket_name}/{object_name}: {e}"
+                ) from e
+            raise S3Error(f"Unable to find file no such file exists: {e}") from e
         except Exception as e:
-            raise "Unable to find file no such file exists {}".format(str(e))
+            raise S3Error(f"Unable to find file no such file exists: {e}") from e
 
     def write_csv_to_s3(
         self,
@@ -71,11 +115,15 @@ class S3Services:
         try:
             csv_buffer = StringIO()
             df_to_upload.to_csv(csv_buffer, header=True, index=False)
-            content_object = self.resource.Object(bucket_name, object_name)
-            content_object.put(Body=csv_buffer.getvalue())
+            self.client.put_object(
+                Bucket=bucket_name,
+                Key=object_name,
+                Body=csv_buffer.getvalue(),
+                ContentType="text/csv",
+            )
             Logging.info("Successfully dump data into s3")
         except Exception as e:
-            raise ("Error while dumping into s3 for the object {}".format(str(e)))
+            raise S3Error(f"Error while dumping into s3 for the object: {e}") from e
 
     def write_pickles_to_s3(
         self, object_name=None, data=None, bucket_name: str = config.s3_bucket_name
@@ -84,8 +132,8 @@ class S3Services:
             Logging.info(f"Start dumping {bucket_name}/{object_name}  into s3")
             pickle_buffer = BytesIO()
             data.to_pickle(pickle_buffer, compression="gzip")
-            self.resource.Object(bucket_name, object_name).put(
-                Body=pickle_buffer.getvalue()
+            self.client.put_object(
+                Bucket=bucket_name, Key=object_name, Body=pickle_buffer.getvalue()
             )
             Logging.info(
                 f"Successfully dumped {bucket_name}/{object_name} data into s3"
@@ -100,12 +148,10 @@ class S3Services:
     ):
         try:
             Logging.info(f"Start reading {bucket_name}/{object_name} file from s3")
-            content_object = self.resource.Object(bucket_name, object_name)
-            read_file = content_object.get()["Body"].read()
-            zipfile = BytesIO(read_file)
-            with gzip.GzipFile(fileobj=zipfile) as gzipfile:
-                content = gzipfile.read()
-            loaded_pickle = pickle.loads(content)
+            body = self.client.get_object(Bucket=bucket_name, Key=object_name)["Body"]
+            # unpickle while decompressing the stream, no intermediate full buffers
+            with gzip.GzipFile(fileobj=body, mode="rb") as gzipfile:
+                loaded_pickle = pickle.load(gzipfile)
             Logging.info(f"File {bucket_name}/{object_name} has been read successfully")
             return loaded_pickle
         except Exception as e:
@@ -114,44 +160,103 @@ class S3Services:
             )
 
     def write_pickle_list_s3(
-        self, object_name=None, data=None, bucket_name: str = config.s3_bucket_name
+        self,
+        object_name=None,
+        data=None,
+        bucket_name: str = config.s3_bucket_name,
+        format: str = "pickle",
     ) -> None:
         """
         Write list as pickle to S3
         :param object_name: Object path
         :param data: List to be saved
         :param bucket_name: S3 bucket name
+        :param format: "pickle" or "arrow", arrow is faster and smaller for homogeneous lists
         :return: None
         """
+        if format == "arrow":
+            return self.write_arrow_list_s3(object_name, data, bucket_name)
+
         try:
             Logging.info(f"Start dumping {bucket_name}/{object_name} into s3")
             byte_object = pickle.dumps(data)
-            self.resource.Object(bucket_name, object_name).put(Body=byte_object)
+            self.client.put_object(Bucket=bucket_name, Key=object_name, Body=byte_object)
         except Exception as e:
             Logging.error(
                 f"Error while dumping {bucket_name}/{object_name} to S3, Exception: {e}"
             )
 
     def read_pickle_list_s3(
-        self, object_name=None, bucket_name: str = config.s3_bucket_name
+        self,
+        object_name=None,
+        bucket_name: str = config.s3_bucket_name,
+        format: str = "pickle",
     ) -> list:
         """
         Read pickled list from S3
         :param object_name: S3 path of file
         :param bucket_name: S3 bucket name
+        :param format: "pickle" or "arrow", must match the format used to write the object
         :return: list of values
         """
+        if format == "arrow":
+            return self.read_arrow_list_s3(object_name, bucket_name)
+
         try:
             Logging.info(f"Start reading {bucket_name}/{object_name} into s3")
-            content_object = self.resource.Object(bucket_name, object_name)
-            read_file = content_object.get()["Body"].read()
-            load_pickle = pickle.loads(read_file)
+            body = self.client.get_object(Bucket=bucket_name, Key=object_name)["Body"]
+            load_pickle = pickle.load(body)
             return load_pickle
         except Exception as e:
             Logging.error(
                 f"Error while reading {bucket_name}/{object_name} from S3, Exception: {e}"
             )
 
+    def write_arrow_list_s3(
+        self, object_name=None, data=None, bucket_name: str = config.s3_bucket_name
+    ) -> None:
+        """
+        Write list as arrow ipc stream to S3
+        :param object_name: Object path
+        :param data: List to be saved, values should share the same type
+        :param bucket_name: S3 bucket name
+        :return: None
+        """
+        try:
+            Logging.info(f"Start dumping {bucket_name}/{object_name} into s3")
+            tbl = pa.table({"v": pa.array(data)})
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, tbl.schema) as writer:
+                writer.write_table(tbl)
+            self.client.put_object(
+                Bucket=bucket_name, Key=object_name, Body=sink.getvalue().to_pybytes()
+            )
+        except Exception as e:
+            Logging.error(
+                f"Error while dumping {bucket_name}/{object_name} to S3, Exception: {e}"
+            )
+
+    def read_arrow_list_s3(
+        self, object_name=None, bucket_name: str = config.s3_bucket_name
+    ) -> list:
+        """
+        Read arrow ipc stream list from S3
+        :param object_name: S3 path of file
+        :param bucket_name: S3 bucket name
+        :return: list of values
+        """
+        try:
+            Logging.info(f"Start reading {bucket_name}/{object_name} into s3")
+            body = self.client.get_object(Bucket=bucket_name, Key=object_name)[
+                "Body"
+            ].read()
+            tbl = pa.ipc.open_stream(pa.BufferReader(body)).read_all()
+            return tbl.column("v").to_pylist()
+        except Exception as e:
+            Logging.error(
+                f"Error while reading {bucket_name}/{object_name} from S3, Exception: {e}"
+            )
+
     @classmethod
     def new_connection(cls):
         return cls.from_connection()
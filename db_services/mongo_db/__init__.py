@@ -1,2 +1,3 @@
 from rplus_utils.db_services.mongo_db.database import MongoDbConnection
 from rplus_utils.db_services.mongo_db.mongo import MongoDatabase as MongoConnection
+from rplus_utils.db_services.mongo_db.aggregation import AggregationTemplate
@@ -0,0 +1,63 @@
+import copy
+import inspect
+from typing import Any, Callable, Dict, List, Tuple
+
+from bson.son import SON
+
+
+class _Param:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class AggregationTemplate:
+    def __init__(self, pipeline_factory: Callable[..., List[Dict[str, Any]]]):
+        """Aggregation pipeline that is built once and only get its values replaced on every call
+        parameters of pipeline_factory must be used as whole values in the pipeline, eg:
+            lambda user_id, limit: [{"$match": {"user_id": user_id}}, {"$limit": limit}]
+        :param pipeline_factory: function that return the pipeline for specified parameters
+        """
+        self.pipeline_factory = pipeline_factory
+        self.param_names = list(inspect.signature(pipeline_factory).parameters)
+        self._pipeline = None
+        self._slots: List[Tuple[Tuple[Any, ...], str]] = []
+
+    def _compile(self) -> None:
+        """Build pipeline with placeholders and record where every parameter is used
+        :return: None
+        """
+        pipeline = self.pipeline_factory(
+            **{name: _Param(name) for name in self.param_names}
+        )
+        self._pipeline = [self._freeze(stage, (i,)) for i, stage in enumerate(pipeline)]
+
+    def _freeze(self, value: Any, path: Tuple[Any, ...]) -> Any:
+        if isinstance(value, _Param):
+            self._slots.append((path, value.name))
+            return None
+        if isinstance(value, dict):
+            return SON((k, self._freeze(v, path + (k,))) for k, v in value.items())
+        if isinstance(value, list):
+            return [self._freeze(v, path + (i,)) for i, v in enumerate(value)]
+        return value
+
+    def __call__(self, **params: Any) -> List[Dict[str, Any]]:
+        """Get pipeline for specified parameters, only containers holding a parameter are copied
+        :param params: value for every parameter of pipeline_factory
+        :return: list of pipeline stages
+        """
+        if self._pipeline is None:
+            self._compile()
+
+        pipeline = copy.copy(self._pipeline)
+        copied = {(): pipeline}
+        for path, name in self._slots:
+            node = pipeline
+            for depth in range(1, len(path)):
+                key = path[:depth]
+                if key not in copied:
+                    node[path[depth - 1]] = copy.copy(node[path[depth - 1]])
+                    copied[key] = node[path[depth - 1]]
+                node = copied[key]
+            node[path[-1]] = params[name]
+        return pipeline
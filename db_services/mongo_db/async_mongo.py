@@ -0,0 +1,164 @@
+"""Asyncio variant of MongoDatabase, needs pymongo >= 4.9 for AsyncMongoClient
+it is not imported by the package, import it from this module directly
+"""
+from typing import List, Any, Dict, Union, Optional
+
+from pymongo import AsyncMongoClient, UpdateOne, UpdateMany, InsertOne
+from pymongo.errors import ExecutionTimeout
+
+from rplus_utils.db_services.mongo_db.mongo import (
+    MONGO_TIMEOUT_MS,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_RETRY_WRITES,
+    MONGO_MESSAGE_TIMEOUT,
+    MONGO_CURSOR_BATCH_SIZE,
+    MONGO_BULK_CHUNK,
+    MONGO_MAX_IDLE_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS,
+    MESSAGE_LOG,
+    BulkWriteSummary,
+    _bulk_op,
+    _log_info,
+    _projection,
+)
+from rplus_utils.logger.logger import Logging
+
+
+class AsyncMongoDatabase:
+    def __init__(
+        self,
+        db_url: str,
+        database_name: str,
+        max_pool_size: int = MONGO_MAX_POOL_SIZE,
+        min_pool_size: int = MONGO_MIN_POOL_SIZE,
+        max_idle_time_ms: Optional[int] = None,
+        wait_queue_timeout_ms: Optional[int] = None,
+        server_selection_timeout_ms: int = MONGO_TIMEOUT_MS,
+    ):
+        self.__cl = AsyncMongoClient(
+            db_url,
+            serverSelectionTimeoutMS=server_selection_timeout_ms,
+            minPoolSize=min_pool_size,
+            maxPoolSize=max_pool_size,
+            maxIdleTimeMS=max_idle_time_ms or MONGO_MAX_IDLE_MS,
+            waitQueueTimeoutMS=wait_queue_timeout_ms or MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+            compressors="zstd,snappy,zlib",
+            zlibCompressionLevel=6,
+            retryReads=MONGO_RETRY_WRITES,
+        )
+        self.__db = self.__cl[database_name]
+
+    def get_connection(self) -> AsyncMongoClient:
+        """Get object connection only to used in other place
+        :return:
+        """
+        return self.__cl
+
+    async def find(
+        self,
+        collection_name: str,
+        query_param: Dict[str, Any],
+        select_fields: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Find single data from our database for specified filter
+        :param collection_name: string collection name
+        :param query_param: dictionary data for filtering data in our database
+        :return: Dictionary object mongodb
+        """
+        try:
+            record_id = await self.__db[collection_name].find_one(
+                query_param, _projection(select_fields)
+            )
+            _log_info("Record fetched - id: {}", record_id)
+            return record_id
+        except ExecutionTimeout:
+            Logging.info(MONGO_MESSAGE_TIMEOUT)
+            return dict()
+
+    async def find_many(
+        self,
+        collection_name: str,
+        query: Dict[str, Any],
+        select_fields: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Find data from our database for specified filter
+        :param collection_name: string collection name
+        :param query: dictionary data for filtering data in our database
+        :return: List of dictionary
+        """
+        try:
+            cursor = (
+                self.__db[collection_name]
+                .find(query, _projection(select_fields))
+                .batch_size(MONGO_CURSOR_BATCH_SIZE)
+            )
+            result = await cursor.to_list(length=None)
+            _log_info(MESSAGE_LOG, len(result))
+            return result
+        except ExecutionTimeout:
+            Logging.info(MONGO_MESSAGE_TIMEOUT)
+            return []
+
+    async def find_aggregated(
+        self, collection_name: str, query: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Query data with aggregate function in our database
+        :param collection_name: string collection name
+        :param query: dictionary data for filtering data in our database
+        :return: list of data based on our query
+        """
+        try:
+            cursor = await self.__db[collection_name].aggregate(
+                query, batchSize=MONGO_CURSOR_BATCH_SIZE
+            )
+            result = [doc async for doc in cursor]
+            _log_info(MESSAGE_LOG, len(result))
+            return result
+        except ExecutionTimeout:
+            Logging.info(MONGO_MESSAGE_TIMEOUT)
+            return []
+
+    async def bulk_write(
+        self,
+        collection_name: str,
+        docs: Union[List[UpdateOne], List[UpdateMany], List[InsertOne]],
+        ordered: bool = False,
+        chunk_size: int = MONGO_BULK_CHUNK,
+        bypass_document_validation: bool = False,
+    ) -> Optional[BulkWriteSummary]:
+        """Bulk operation to database, operations are sent in chunks of chunk_size
+        :param collection_name: string collection name
+        :param docs: list of method mongodb
+        :param ordered: stop on the first error and apply operations in order
+        :param chunk_size: number of operations sent per bulk write command
+        :param bypass_document_validation: skip collection schema validation, needs
+            bypassDocumentValidation privilege which readWrite role does not have
+        :return: merged counts of all chunks
+        """
+        docs = [_bulk_op(op) for op in docs]
+        try:
+            coll = self.__db[collection_name]
+            summary = BulkWriteSummary(0, 0, 0, 0, 0)
+            for i in range(0, len(docs), chunk_size):
+                result = await coll.bulk_write(
+                    docs[i : i + chunk_size],
+                    ordered=ordered,
+                    bypass_document_validation=bypass_document_validation,
+                    comment="bulk_write",
+                )
+                summary = BulkWriteSummary(
+                    summary.inserted_count + result.inserted_count,
+                    summary.matched_count + result.matched_count,
+                    summary.modified_count + result.modified_count,
+                    summary.deleted_count + result.deleted_count,
+                    summary.upserted_count + result.upserted_count,
+                )
+            return summary
+        except ExecutionTimeout:
+            Logging.info(MONGO_MESSAGE_TIMEOUT)
+            return None
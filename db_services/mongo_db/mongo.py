@@ -1,8 +1,24 @@
-from typing import List, Any, Dict, Union, Tuple
+import copy
+import hashlib
+import logging
+import math
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from itertools import islice
+from typing import List, Any, Dict, Union, Tuple, Optional, Iterator, Iterable, Callable, Set
 
+import orjson
 import pymongo
-from pymongo import UpdateOne, UpdateMany, InsertOne
-from pymongo.errors import ExecutionTimeout
+import pymongo.collection
+import pymongo.cursor
+from pymongo import UpdateOne, UpdateMany, InsertOne, DeleteOne, DeleteMany, ReplaceOne
+from bson import encode
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from cachetools import LRUCache, TTLCache
+from pymongo.errors import ExecutionTimeout, PyMongoError
+from pymongo.read_preferences import SecondaryPreferred
 
 from rplus_utils.common.config import config
 from rplus_utils.logger.logger import Logging
@@ -13,20 +29,346 @@ MONGO_MIN_POOL_SIZE = config.mongo_min_pool_size
 MONGO_MAX_POOL_SIZE = config.mongo_max_pool_size
 MONGO_RETRY_WRITES = config.mongo_retry_write
 MONGO_MESSAGE_TIMEOUT = config.mongo_message_timeout
+MONGO_QUERY_CACHE_TTL = getattr(config, "mongo_query_cache_ttl", 60)
+MONGO_CURSOR_BATCH_SIZE = getattr(config, "mongo_cursor_batch_size", 1000)
+MONGO_BULK_CHUNK = getattr(config, "mongo_bulk_chunk", 1000)
+MONGO_MAX_IDLE_MS = getattr(config, "mongo_max_idle_ms", 300_000)
+MONGO_WAIT_QUEUE_TIMEOUT_MS = getattr(config, "mongo_wait_queue_timeout_ms", 2_000)
+MONGO_CONNECT_TIMEOUT_MS = getattr(config, "mongo_connect_timeout_ms", 5_000)
+MONGO_SOCKET_TIMEOUT_MS = getattr(config, "mongo_socket_timeout_ms", 30_000)
+MONGO_PREWARM = getattr(config, "mongo_prewarm", True)
+MONGO_INSERT_WORKERS = getattr(config, "mongo_insert_workers", 4)
 log_base = "Records count effected = {}"
+MESSAGE_LOG = "Records fetched with length = {}"
+_MISS = object()
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+_QUERY_ENC_CACHE = LRUCache(maxsize=2048)
+_QUERY_ENC_CACHE_LOCK = threading.Lock()
+_CLIENT_CACHE: Dict[Tuple[Any, ...], pymongo.MongoClient] = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+BULK_OPERATIONS = (InsertOne, UpdateOne, UpdateMany, DeleteOne, DeleteMany, ReplaceOne)
+
+BulkWriteSummary = namedtuple(
+    "BulkWriteSummary",
+    [
+        "inserted_count",
+        "matched_count",
+        "modified_count",
+        "deleted_count",
+        "upserted_count",
+    ],
+)
+
+
+def _typed_json(value: Any) -> Dict[str, str]:
+    """Serialize non json value with its type so ObjectId("x") and "x" get different keys
+    :param value: any bson value
+    :return: dictionary with type name and string value
+    """
+    return {"$type": type(value).__name__, "$value": str(value)}
+
+
+def _has_non_finite(value: Any) -> bool:
+    """Check if value has nan or infinite float, orjson write all of them as null
+    :param value: any query value
+    :return: boolean (true, false)
+    """
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite(v) for v in value)
+    return False
+
+
+def _tag_non_finite(value: Any) -> Any:
+    """Replace nan and infinite float with typed value so they do not collide with null
+    :param value: any query value
+    :return: value with non finite floats tagged
+    """
+    if isinstance(value, float) and not math.isfinite(value):
+        return {"$type": "float", "$value": repr(value)}
+    if isinstance(value, dict):
+        return {k: _tag_non_finite(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_tag_non_finite(v) for v in value]
+    return value
+
+
+def _encoded_query(query: Dict[str, Any]) -> Union[Dict[str, Any], RawBSONDocument]:
+    """Get pre encoded bson query so repeated queries are encoded only once
+    key order is kept in the cache key since embedded document equality depends on it,
+    queries with values json can not represent as is (ObjectId, datetime, nan ...) are not cached
+    :param query: dictionary query
+    :return: raw bson document or the query itself
+    """
+    if _has_non_finite(query):
+        return query
+    try:
+        key = orjson.dumps(
+            query,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_SUBCLASS,
+        )
+    except TypeError:
+        return query
+    with _QUERY_ENC_CACHE_LOCK:
+        encoded = _QUERY_ENC_CACHE.get(key)
+    if encoded is None:
+        encoded = RawBSONDocument(encode(query))
+        with _QUERY_ENC_CACHE_LOCK:
+            _QUERY_ENC_CACHE[key] = encoded
+    return encoded
+
+
+def _log_info(message: str, *args: Any) -> None:
+    """Print logging info message, formatting is skipped when info level is disabled
+    :param message: string message with {} placeholders
+    :param args: values for the placeholders
+    :return: None
+    """
+    if Logging.is_enabled_for(logging.INFO):
+        Logging.info(message.format(*args))
+
+
+def _bulk_op(op: Any) -> Any:
+    """Make sure bulk operation is a pymongo operation object, plain dictionary become insert
+    :param op: pymongo operation or dictionary document
+    :return: pymongo operation
+    """
+    if isinstance(op, BULK_OPERATIONS):
+        return op
+    if isinstance(op, dict):
+        return InsertOne(op)
+    raise TypeError("invalid bulk write operation: {}".format(type(op).__name__))
+
+
+def _path_collides(field: str, paths: Iterable[str]) -> bool:
+    """Check if field is parent or child of other projected path, eg: meta and meta.date
+    mongo reject projection containing both of them
+    :param field: string field path
+    :param paths: projected field paths
+    :return: boolean (true, false)
+    """
+    return any(
+        path != field and (field.startswith(path + ".") or path.startswith(field + "."))
+        for path in paths
+    )
+
+
+def _projection(
+    select_fields: Optional[Dict[str, Any]], sort_field: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """Build projection without touching caller dictionary, None means no projection
+    when sort_field is given the sort keys are added to inclusion projections so the
+    query can be index covered, exclusion projections are left as is
+    :param select_fields: dictionary of selected fields
+    :param sort_field: string key data that query is sorted on
+    :return: projection dictionary or None
+    """
+    if not select_fields:
+        return None
+    projection = {**select_fields, "_id": 0}
+    # _id can be excluded in inclusion projection, it does not decide the projection type
+    fields = [v for k, v in select_fields.items() if k != "_id"]
+    if sort_field is not None and fields and all(fields):
+        for field in ("score", sort_field):
+            if not _path_collides(field, projection):
+                projection[field] = 1
+    return projection
+
+
+def _sort_spec(field_to_be_sorted_on: str, is_asc: bool) -> List[Tuple[str, int]]:
+    """Build sort spec on score then specified field, both in the same direction
+    :param field_to_be_sorted_on: string key data that need to sort on
+    :param is_asc: is data sorted asc or desc ?
+    :return: pymongo sort spec
+    """
+    direction = pymongo.DESCENDING if is_asc is False else pymongo.ASCENDING
+    return [("score", direction), (field_to_be_sorted_on, direction)]
+
+
+def _iter_batches(cursor: Iterable[Dict[str, Any]], batch_size: int):
+    """Group cursor documents into lists of batch_size
+    :param cursor: pymongo cursor
+    :param batch_size: number of documents per batch
+    :return: iterator of list of dictionary
+    """
+    while True:
+        chunk = list(islice(cursor, batch_size))
+        if not chunk:
+            break
+        yield chunk
 
 
 class MongoDatabase:
-    def __init__(self, db_url: str, database_name: str):
-        self.__cl = pymongo.MongoClient(
-            db_url,
-            serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
-            minPoolSize=MONGO_MIN_POOL_SIZE,
-            maxPoolSize=MONGO_MAX_POOL_SIZE,
+    _query_cache = TTLCache(maxsize=4096, ttl=MONGO_QUERY_CACHE_TTL)
+    _query_cache_lock = threading.Lock()
+    # per (cluster, database, collection): bumped on every write, and keys cached for it
+    _cache_generation: Dict[Tuple[str, str, str], int] = {}
+    _cache_index: Dict[Tuple[str, str, str], Set[Tuple[str, str, str, bytes]]] = {}
+
+    def __init__(
+        self,
+        db_url: str,
+        database_name: str,
+        max_pool_size: int = MONGO_MAX_POOL_SIZE,
+        min_pool_size: int = MONGO_MIN_POOL_SIZE,
+        max_idle_time_ms: Optional[int] = None,
+        wait_queue_timeout_ms: Optional[int] = None,
+        server_selection_timeout_ms: int = MONGO_TIMEOUT_MS,
+    ):
+        client_options = dict(
+            serverSelectionTimeoutMS=server_selection_timeout_ms,
+            minPoolSize=min_pool_size,
+            maxPoolSize=max_pool_size,
+            maxIdleTimeMS=max_idle_time_ms or MONGO_MAX_IDLE_MS,
+            waitQueueTimeoutMS=wait_queue_timeout_ms or MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+            compressors="zstd,snappy,zlib",
+            zlibCompressionLevel=6,
             retryReads=MONGO_RETRY_WRITES,
         )
+        # databases on the same cluster with the same pool options share one client
+        client_key = (db_url, tuple(sorted(client_options.items())))
+        with _CLIENT_CACHE_LOCK:
+            is_new_client = client_key not in _CLIENT_CACHE
+            if is_new_client:
+                _CLIENT_CACHE[client_key] = pymongo.MongoClient(db_url, **client_options)
+            self.__cl = _CLIENT_CACHE[client_key]
         self.__db = self.__cl[database_name]
-        self._message_log = "Records fetched with length = {}"
+        # results of different clusters with the same database name never share cache entries
+        self._cluster = db_url
+        self._inflight: Dict[Tuple[str, str, str, bytes], Future] = {}
+        self._inflight_lock = threading.Lock()
+        if MONGO_PREWARM and is_new_client:
+            # warm up is best effort, an unreachable server still fails on first query
+            try:
+                self.warm_up(connections=min_pool_size)
+            except PyMongoError as e:
+                Logging.warning(f"mongo warm up failed: {e}")
+
+    def _cache_key(
+        self, method: str, collection_name: str, *args: Any
+    ) -> Tuple[str, str, str, bytes]:
+        """Build stable cache key for specified query
+        :param method: name of method that run the query
+        :param collection_name: string collection name
+        :param args: query arguments
+        :return: tuple of cluster url, database name, collection name and query digest
+        """
+        # key order is kept, embedded document equality depends on it
+        if _has_non_finite(args):
+            args = _tag_non_finite(args)
+        digest = hashlib.blake2b(
+            orjson.dumps(
+                (method, args),
+                default=_typed_json,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_SUBCLASS,
+            )
+        ).digest()
+        return self._cluster, self.__db.name, collection_name, digest
+
+    def _cache_get(self, key: Tuple[str, str, str, bytes]) -> Any:
+        """Get copy of cached result, return _MISS if not exists
+        :param key: cache key
+        :return: cached result
+        """
+        with self._query_cache_lock:
+            result = self._query_cache.get(key, _MISS)
+        return result if result is _MISS else copy.deepcopy(result)
+
+    def _generation(self, key: Tuple[str, str, str, bytes]) -> int:
+        """Get write generation of the collection of cache key, read it before running query
+        :param key: cache key
+        :return: integer generation
+        """
+        with self._query_cache_lock:
+            return self._cache_generation.get(key[:3], 0)
+
+    def _cache_set(
+        self, key: Tuple[str, str, str, bytes], result: Any, generation: int
+    ) -> Any:
+        """Save copy of result to cache, skipped when collection is written since query started
+        :param key: cache key
+        :param result: query result
+        :param generation: collection generation read before the query was run
+        :return: private copy of result, the one saved in cache, callers must copy it
+        """
+        stored = copy.deepcopy(result)
+        scope = key[:3]
+        with self._query_cache_lock:
+            if self._cache_generation.get(scope, 0) != generation:
+                return stored
+            self._query_cache[key] = stored
+            keys = self._cache_index.setdefault(scope, set())
+            keys.add(key)
+            # entries expired or evicted by the cache are dropped from index now and then
+            if len(keys) > self._query_cache.maxsize:
+                self._cache_index[scope] = {k for k in keys if k in self._query_cache}
+        return stored
+
+    def _single_flight(
+        self,
+        key: Tuple[str, str, str, bytes],
+        run_query: Callable[[], Tuple[Any, Any]],
+    ) -> Any:
+        """Run query only once for identical concurrent calls, other callers wait for its result
+        :param key: cache key of the query
+        :param run_query: function that execute the query, return the result and a private
+            copy of it shared with other callers
+        :return: query result
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not is_leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result, shared = run_query()
+            # followers copy from a private object, never from the one the caller owns
+            future.set_result(shared)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+
+    def invalidate(self, collection_name: str) -> None:
+        """Drop all cached results for specified collection, queries started before it
+        will not cache their result
+        :param collection_name: string collection name
+        :return: None
+        """
+        scope = (self._cluster, self.__db.name, collection_name)
+        with self._query_cache_lock:
+            self._cache_generation[scope] = self._cache_generation.get(scope, 0) + 1
+            for key in self._cache_index.pop(scope, ()):
+                self._query_cache.pop(key, None)
+
+    def warm_up(self, connections: int = 1) -> None:
+        """Ping the server so the first real request does not pay the handshake cost
+        :param connections: number of concurrent pings, each one open its own socket
+        :return: None
+        """
+        if connections <= 1:
+            self.__cl.admin.command("ping")
+            return
+
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(
+                executor.map(
+                    lambda _: self.__cl.admin.command("ping"), range(connections)
+                )
+            )
 
     def get_connection(self) -> pymongo.MongoClient:
         """Get object connection only to used in other place
@@ -41,7 +383,14 @@ class MongoDatabase:
         :return: integer count data
         """
         try:
-            return self.__db[collection_name].count_documents(query)
+            # unfiltered count read collection metadata instead of scanning it
+            if not query:
+                return self.__db[collection_name].estimated_document_count(
+                    maxTimeMS=MONGO_TIMEOUT_MS
+                )
+            return self.__db[collection_name].count_documents(
+                query, maxTimeMS=MONGO_TIMEOUT_MS
+            )
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
             return ""
@@ -50,17 +399,55 @@ class MongoDatabase:
         self,
         collection_name: str,
         docs: Union[List[UpdateOne], List[UpdateMany], List[InsertOne]],
-    ) -> None:
-        """Bulk operation to database
+        ordered: bool = False,
+        chunk_size: int = MONGO_BULK_CHUNK,
+        bypass_document_validation: bool = False,
+        parallel: int = 1,
+    ) -> Optional[BulkWriteSummary]:
+        """Bulk operation to database, operations are sent in chunks of chunk_size
         :param collection_name: string collection name
         :param docs: list of method mongodb
-        :return: None
+        :param ordered: stop on the first error and apply operations in order
+        :param chunk_size: number of operations sent per bulk write command
+        :param bypass_document_validation: skip collection schema validation, needs
+            bypassDocumentValidation privilege which readWrite role does not have
+        :param parallel: number of chunks written concurrently, chunks have no order
+            between them so it can not be used with ordered
+        :return: merged counts of all chunks
         """
+        if ordered and parallel > 1:
+            raise ValueError("ordered bulk_write can not be written in parallel chunks")
+        docs = [_bulk_op(op) for op in docs]
+        coll = self.__db[collection_name]
+        chunks = [docs[i : i + chunk_size] for i in range(0, len(docs), chunk_size)]
+
+        def write(chunk):
+            return coll.bulk_write(
+                chunk,
+                ordered=ordered,
+                bypass_document_validation=bypass_document_validation,
+                comment="bulk_write",
+            )
+
         try:
-            return self.__db[collection_name].bulk_write(docs)
+            if parallel > 1:
+                with ThreadPoolExecutor(max_workers=parallel) as executor:
+                    results = list(executor.map(write, chunks))
+            else:
+                results = [write(chunk) for chunk in chunks]
+            return BulkWriteSummary(
+                sum(r.inserted_count for r in results),
+                sum(r.matched_count for r in results),
+                sum(r.modified_count for r in results),
+                sum(r.deleted_count for r in results),
+                sum(r.upserted_count for r in results),
+            )
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
             return None
+        finally:
+            # chunks sent before a failure are already committed
+            self.invalidate(collection_name)
 
     def create_index(
         self,
@@ -75,7 +462,7 @@ class MongoDatabase:
         :return: string indexing name
         """
         try:
-            return self.__db[collection_name].ensure_index(
+            return self.__db[collection_name].create_index(
                 index_key, unique=is_unique, background=True
             )
         except ExecutionTimeout:
@@ -89,8 +476,10 @@ class MongoDatabase:
         :return: string record id
         """
         try:
-            record_id = self.__db[collection_name].insert(data)
-            Logging.info("Record inserted - id: {}".format(record_id))
+            record_id = self.__db[collection_name].insert_one(data).inserted_id
+            self.invalidate(collection_name)
+            _log_info("Record inserted - id: {}", record_id)
+            return record_id
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
             return ""
@@ -100,29 +489,41 @@ class MongoDatabase:
         self,
         collection_name: str,
         query_param: Dict[str, Any],
-        select_fields: Dict[str, Any] = {},
+        select_fields: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """Find single data from our database for specified filter
         :param collection_name: string collection name
         :param query_param: dictionary data for filtering data in our database
         :return: Dictionary object mongodb
         """
-        try:
-            if len(select_fields) > 0:
-                select_fields["_id"] = 0
-            record_id = self.__db[collection_name].find_one(query_param, select_fields)
-            Logging.info("Record fetched - id: {}".format(record_id))
-            return record_id
-        except ExecutionTimeout:
-            Logging.info(MONGO_MESSAGE_TIMEOUT)
-            return dict()
+        key = self._cache_key("find", collection_name, query_param, select_fields)
+        cached = self._cache_get(key)
+        if cached is not _MISS:
+            return cached
+
+        def run_query():
+            generation = self._generation(key)
+            try:
+                projection = _projection(select_fields)
+                record_id = self.__db[collection_name].find_one(
+                    _encoded_query(query_param),
+                    projection,
+                    max_time_ms=MONGO_TIMEOUT_MS,
+                )
+                _log_info("Record fetched - id: {}", record_id)
+                return record_id, self._cache_set(key, record_id, generation)
+            except ExecutionTimeout:
+                Logging.info(MONGO_MESSAGE_TIMEOUT)
+                return dict(), dict()
+
+        return self._single_flight(key, run_query)
 
     @measure_it
     def find_without_cache(
         self,
         collection_name: str,
         query_param: Dict[str, Any],
-        select_fields: Dict[str, Any] = {},
+        select_fields: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """Find single data from our database for specified filter
         :param collection_name: string collection name
@@ -130,10 +531,11 @@ class MongoDatabase:
         :return: Dictionary object mongodb
         """
         try:
-            if len(select_fields) > 0:
-                select_fields["_id"] = 0
-            record_id = self.__db[collection_name].find_one(query_param, select_fields)
-            Logging.info("Record fetched - id: {}".format(record_id))
+            projection = _projection(select_fields)
+            record_id = self.__db[collection_name].find_one(
+                query_param, projection, max_time_ms=MONGO_TIMEOUT_MS
+            )
+            _log_info("Record fetched - id: {}", record_id)
             return record_id
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
@@ -148,7 +550,8 @@ class MongoDatabase:
         is_asc: bool = False,
         page_no: int = None,
         page_size: int = None,
-        select_fields: Dict[str, Any] = {},
+        select_fields: Optional[Dict[str, Any]] = None,
+        hint: Optional[Union[str, List[Tuple[str, int]]]] = None,
     ) -> List[Dict[str, Any]]:
         """Find data in our database and sorted value based on key selected
         :param collection_name: string collection name
@@ -157,86 +560,47 @@ class MongoDatabase:
         :param is_asc: is data sorted asc or desc ?
         :param page_no: what is current page
         :param page_size: how much content per per page
+        :param hint: index name or index spec the query planner must use
         :return: List of sorted data based on specified key
         """
+        key = self._cache_key(
+            "find_and_sorted_value",
+            collection_name,
+            query,
+            field_to_be_sorted_on,
+            is_asc,
+            page_no,
+            page_size,
+            select_fields,
+            hint,
+        )
+        cached = self._cache_get(key)
+        if cached is not _MISS:
+            return cached
+        generation = self._generation(key)
         try:
-            if len(select_fields) > 0:
-                select_fields["_id"] = 0
-            if page_no is None or page_size is None:
-                cursor = (
-                    self.__db[collection_name]
-                    .find(query, select_fields)
-                    .sort(
-                        [
-                            (
-                                "score",
-                                pymongo.DESCENDING
-                                if is_asc is False
-                                else pymongo.ASCENDING,
-                            ),
-                            (
-                                field_to_be_sorted_on,
-                                pymongo.DESCENDING
-                                if is_asc is False
-                                else pymongo.ASCENDING,
-                            ),
-                        ]
-                    )
-                )
-                result = [i for i in cursor]
-                Logging.info(self._message_log.format(len(result)))
-                return result
-
-            if page_no in [0, 1]:
-                cursor = (
-                    self.__db[collection_name]
-                    .find(query, select_fields)
-                    .sort(
-                        [
-                            (
-                                "score",
-                                pymongo.DESCENDING
-                                if is_asc is False
-                                else pymongo.ASCENDING,
-                            ),
-                            (
-                                field_to_be_sorted_on,
-                                pymongo.DESCENDING
-                                if is_asc is False
-                                else pymongo.ASCENDING,
-                            ),
-                        ]
-                    )
-                    .limit(page_size or 10)
-                )
-                result = [i for i in cursor]
-                Logging.info(self._message_log.format(len(result)))
-                return result
-
+            projection = _projection(select_fields, field_to_be_sorted_on)
+            # skip=0 and limit=0 are no-ops in pymongo
+            skip, limit = 0, 0
+            if page_no is not None and page_size is not None:
+                if page_no in [0, 1]:
+                    limit = page_size or 10
+                else:
+                    skip, limit = (page_no - 1) * page_size, page_size
             cursor = (
                 self.__db[collection_name]
-                .find(query, select_fields)
-                .sort(
-                    [
-                        (
-                            "score",
-                            pymongo.DESCENDING
-                            if is_asc is False
-                            else pymongo.ASCENDING,
-                        ),
-                        (
-                            field_to_be_sorted_on,
-                            pymongo.DESCENDING
-                            if is_asc is False
-                            else pymongo.ASCENDING,
-                        ),
-                    ]
-                )
-                .skip((page_no - 1) * page_size)
-                .limit(page_size)
+                .find(query, projection)
+                .sort(_sort_spec(field_to_be_sorted_on, is_asc))
+                .skip(skip)
+                .limit(limit)
+            )
+            if hint is not None:
+                cursor = cursor.hint(hint)
+            result = list(
+                cursor.max_time_ms(MONGO_TIMEOUT_MS).batch_size(MONGO_CURSOR_BATCH_SIZE)
             )
-            result = [i for i in cursor]
-            Logging.info(self._message_log.format(len(result)))
+            _log_info(MESSAGE_LOG, len(result))
+            self._cache_set(key, result, generation)
             return result
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
@@ -247,14 +611,25 @@ class MongoDatabase:
         self,
         collection_name: str,
         query: Dict[str, Any],
-        select_fields: Dict[str, Any] = {},
+        select_fields: Optional[Dict[str, Any]] = None,
+        read_from_secondary: bool = False,
     ) -> List[Dict[str, Any]]:
+        """Find recommendation data from our database for specified filter
+        :param collection_name: string collection name
+        :param query: dictionary data for filtering data in our database
+        :param select_fields: dictionary projection
+        :param read_from_secondary: route the query to a secondary member
+        :return: List of dictionary
+        """
         try:
-            if len(select_fields) > 0:
-                select_fields["_id"] = 0
-            cursor = self.__db[collection_name].find(query, select_fields)
-            result = [i for i in cursor]
-            Logging.info(self._message_log.format(len(result)))
+            projection = _projection(select_fields)
+            cursor = self._coll(collection_name, read_from_secondary).find(
+                query, projection
+            )
+            result = list(
+                cursor.max_time_ms(MONGO_TIMEOUT_MS).batch_size(MONGO_CURSOR_BATCH_SIZE)
+            )
+            _log_info(MESSAGE_LOG, len(result))
             return result
 
         except ExecutionTimeout:
@@ -266,14 +641,15 @@ class MongoDatabase:
         self,
         collection_name: str,
         query: Dict[str, Any],
-        select_fields: Dict[str, Any] = {},
+        select_fields: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
         try:
-            if len(select_fields) > 0:
-                select_fields["_id"] = 0
-            cursor = self.__db[collection_name].find(query, select_fields)
-            result = [i for i in cursor]
-            Logging.info(self._message_log.format(len(result)))
+            projection = _projection(select_fields)
+            cursor = self.__db[collection_name].find(query, projection)
+            result = list(
+                cursor.max_time_ms(MONGO_TIMEOUT_MS).batch_size(MONGO_CURSOR_BATCH_SIZE)
+            )
+            _log_info(MESSAGE_LOG, len(result))
             return result
 
         except ExecutionTimeout:
@@ -289,7 +665,8 @@ class MongoDatabase:
         limit_count: int,
         is_asc: bool = False,
         skip_count: int = 0,
-        select_fields: Dict[str, Any] = {},
+        select_fields: Optional[Dict[str, Any]] = None,
+        hint: Optional[Union[str, List[Tuple[str, int]]]] = None,
     ) -> List[Dict[str, Any]]:
         """Find data in our database and sorted value based on key selected
         :param collection_name: string collection name
@@ -298,35 +675,24 @@ class MongoDatabase:
         :param is_asc: is data sorted asc or desc ?
         :param limit_count: limit for the records projection
         :param skip_count: how many content need to skip
+        :param hint: index name or index spec the query planner must use
         :return: List of sorted data based on specified key
         """
         try:
-            if len(select_fields) > 0:
-                select_fields["_id"] = 0
+            projection = _projection(select_fields, field_to_be_sorted_on)
             cursor = (
                 self.__db[collection_name]
-                .find(query, select_fields)
-                .sort(
-                    [
-                        (
-                            "score",
-                            pymongo.DESCENDING
-                            if is_asc is False
-                            else pymongo.ASCENDING,
-                        ),
-                        (
-                            field_to_be_sorted_on,
-                            pymongo.DESCENDING
-                            if is_asc is False
-                            else pymongo.ASCENDING,
-                        ),
-                    ]
-                )
+                .find(query, projection)
+                .sort(_sort_spec(field_to_be_sorted_on, is_asc))
                 .skip(skip_count)
                 .limit(limit_count)
             )
-            result = [i for i in cursor]
-            Logging.info(self._message_log.format(len(result)))
+            if hint is not None:
+                cursor = cursor.hint(hint)
+            result = list(
+                cursor.max_time_ms(MONGO_TIMEOUT_MS).batch_size(MONGO_CURSOR_BATCH_SIZE)
+            )
+            _log_info(MESSAGE_LOG, len(result))
             return result
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
@@ -334,16 +700,26 @@ class MongoDatabase:
 
     @measure_it
     def find_aggregated(
-        self, collection_name: str, query: List[Dict[str, Any]]
+        self,
+        collection_name: str,
+        query: List[Dict[str, Any]],
+        read_from_secondary: bool = False,
     ) -> List[Dict[str, Any]]:
         """Query data with aggregate function in our database
         :param collection_name: string collection name
         :param query: dictionary data for filtering data in our database
+        :param read_from_secondary: route the query to a secondary member
         :return: list of data based on our query
         """
         try:
-            result = [i for i in self.__db[collection_name].aggregate(query)]
-            Logging.info(self._message_log.format(len(result)))
+            result = list(
+                self._coll(collection_name, read_from_secondary).aggregate(
+                    query,
+                    batchSize=MONGO_CURSOR_BATCH_SIZE,
+                    maxTimeMS=MONGO_TIMEOUT_MS,
+                )
+            )
+            _log_info(MESSAGE_LOG, len(result))
             return result
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
@@ -355,24 +731,35 @@ class MongoDatabase:
             collection_name: str,
             match: List[Dict[str, Any]],
             group: List[Dict[str, Any]],
-            limit: int = 1000000
+            limit: int = 1000000,
+            early_limit: bool = False,
+            read_from_secondary: bool = False,
     ) -> List[Dict[str, Any]]:
         """Query data with aggregate function in our database
         :param collection_name: string collection name
         :param query: dictionary data for filtering data in our database
         :param group: dictionary data for aggregating results
         :param limit: no of records to be fetched
+        :param early_limit: also limit matched documents before grouping, this change
+            the result since only the first `limit` matched documents are grouped,
+            use it only when group accumulators do not need the full matched set
+        :param read_from_secondary: route the query to a secondary member
         :return: list of data based on our query
         """
         try:
+            pipeline = [{'$match': match}]
+            if early_limit:
+                pipeline.append({'$limit': limit})
+            pipeline += [{'$group': group}, {'$limit': limit}]
 
-            result = [i for i in self.__db[collection_name].aggregate([
-                {'$match': match},
-                {'$group': group},
-                {'$limit': limit}
-            ])]
-            Logging.info(f"return result with limit: {limit}")
-            Logging.info(self._message_log.format(len(result)))
+            result = list(self._coll(collection_name, read_from_secondary).aggregate(
+                pipeline,
+                allowDiskUse=True,
+                batchSize=MONGO_CURSOR_BATCH_SIZE,
+                maxTimeMS=MONGO_TIMEOUT_MS,
+            ))
+            _log_info("return result with limit: {}", limit)
+            _log_info(MESSAGE_LOG, len(result))
             return result
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
@@ -392,7 +779,8 @@ class MongoDatabase:
         """
         try:
             cursor = self.__db[collection_name].update_one(query, data, upsert=True)
-            Logging.info(log_base.format(cursor.matched_count))
+            self.invalidate(collection_name)
+            _log_info(log_base, cursor.matched_count)
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
 
@@ -404,17 +792,40 @@ class MongoDatabase:
         """
         try:
             cursor = self.__db[collection_name].delete_one(query)
-            Logging.info(log_base.format(cursor.deleted_count))
+            self.invalidate(collection_name)
+            _log_info(log_base, cursor.deleted_count)
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
 
-    def distinct(self, field: str, collection_name: str, query: Dict[str, Any]):
+    def distinct(
+        self, field: str, collection_name: str, query: Dict[str, Any]
+    ) -> List[Any]:
+        """Get distinct values of field, streamed through aggregation so it has no 16MB reply limit
+        array values are unwound and null is kept like distinct command, missing fields and
+        empty arrays give no value
+        :param field: string field name
+        :param collection_name: string collection name
+        :param query: dictionary data for filtering data in our database
+        :return: list of distinct values
+        """
         try:
-            cursor = self.__db[collection_name].distinct(field, query)
-            # Logging.info(log_base.format(cursor.matched_count))
+            pipeline = [
+                {"$match": query},
+                # plain unwind drops null too, keep it and skip only the missing field
+                {"$unwind": {"path": f"${field}", "preserveNullAndEmptyArrays": True}},
+                {"$match": {field: {"$exists": True}}},
+                {"$group": {"_id": f"${field}"}},
+            ]
+            cursor = self.__db[collection_name].aggregate(
+                pipeline,
+                allowDiskUse=True,
+                batchSize=MONGO_CURSOR_BATCH_SIZE,
+                maxTimeMS=MONGO_TIMEOUT_MS,
+            )
+            return [d["_id"] for d in cursor]
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
-        return cursor
+            return []
 
     def update_many(
         self,
@@ -430,7 +841,8 @@ class MongoDatabase:
         """
         try:
             cursor = self.__db[collection_name].update_many(query, data)
-            Logging.info(log_base.format(cursor.matched_count))
+            self.invalidate(collection_name)
+            _log_info(log_base, cursor.matched_count)
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
 
@@ -439,29 +851,151 @@ class MongoDatabase:
         self,
         collection_name: str,
         query: Dict[str, Any],
-        select_fields: Dict[str, Any] = {},
+        select_fields: Optional[Dict[str, Any]] = None,
+        hint: Optional[Union[str, List[Tuple[str, int]]]] = None,
     ) -> List[Dict[str, Any]]:
         """Find data from our database for specified filter
         :param collection_name: string collection name
         :param query: dictionary data for filtering data in our database
+        :param hint: index name or index spec the query planner must use
         :return: List of dictionary
         """
+        key = self._cache_key(
+            "find_many", collection_name, query, select_fields, hint
+        )
+        cached = self._cache_get(key)
+        if cached is not _MISS:
+            return cached
+
+        def run_query():
+            generation = self._generation(key)
+            try:
+                projection = _projection(select_fields)
+                cursor = self.__db[collection_name].find(
+                    _encoded_query(query), projection
+                )
+                if hint is not None:
+                    cursor = cursor.hint(hint)
+                result = list(
+                    cursor.max_time_ms(MONGO_TIMEOUT_MS).batch_size(
+                        MONGO_CURSOR_BATCH_SIZE
+                    )
+                )
+                _log_info(MESSAGE_LOG, len(result))
+                return result, self._cache_set(key, result, generation)
+            except ExecutionTimeout:
+                Logging.info(MONGO_MESSAGE_TIMEOUT)
+                return [], []
+
+        return self._single_flight(key, run_query)
+
+    def _coll(
+        self, collection_name: str, secondary: bool = False
+    ) -> pymongo.collection.Collection:
+        """Get collection, optionally reading from secondary members of the replica set
+        :param collection_name: string collection name
+        :param secondary: read from secondary when one is available
+        :return: pymongo collection
+        """
+        coll = self.__db[collection_name]
+        if secondary:
+            return coll.with_options(read_preference=SecondaryPreferred())
+        return coll
+
+    def _raw_coll(self, collection_name: str) -> pymongo.collection.Collection:
+        """Get collection that return documents as undecoded bson bytes
+        :param collection_name: string collection name
+        :return: pymongo collection
+        """
+        return self.__db[collection_name].with_options(codec_options=RAW_CODEC_OPTIONS)
+
+    @measure_it
+    def find_many_raw(
+        self,
+        collection_name: str,
+        query: Dict[str, Any],
+        select_fields: Optional[Dict[str, Any]] = None,
+    ) -> List[RawBSONDocument]:
+        """Find data from our database for specified filter without decoding it to dictionary,
+        use it when result is passed through as is eg: bson.json_util.dumps for http response
+        :param collection_name: string collection name
+        :param query: dictionary data for filtering data in our database
+        :return: List of raw bson document
+        """
         try:
-            if len(select_fields) > 0:
-                select_fields["_id"] = 0
-            result = [i for i in self.__db[collection_name].find(query, select_fields)]
-            Logging.info(self._message_log.format(len(result)))
+            result = list(
+                self._raw_coll(collection_name)
+                .find(query, _projection(select_fields))
+                .max_time_ms(MONGO_TIMEOUT_MS)
+                .batch_size(MONGO_CURSOR_BATCH_SIZE)
+            )
+            _log_info(MESSAGE_LOG, len(result))
             return result
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
             return []
 
+    def find_many_cursor(
+        self,
+        collection_name: str,
+        query: Dict[str, Any],
+        select_fields: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+    ) -> pymongo.cursor.Cursor:
+        """Get raw cursor from our database for specified filter, documents are fetched lazily
+        :param collection_name: string collection name
+        :param query: dictionary data for filtering data in our database
+        :param select_fields: dictionary projection
+        :param batch_size: number of documents fetched per round trip
+        :return: pymongo cursor
+        """
+        projection = _projection(select_fields)
+        return (
+            self.__db[collection_name]
+            .find(query, projection)
+            .batch_size(batch_size)
+        )
+
+    def iter_many(
+        self,
+        collection_name: str,
+        query: Dict[str, Any],
+        select_fields: Optional[Dict[str, Any]] = None,
+        batch_size: int = MONGO_CURSOR_BATCH_SIZE,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate data from our database for specified filter in fixed size batches
+        :param collection_name: string collection name
+        :param query: dictionary data for filtering data in our database
+        :param select_fields: dictionary projection
+        :param batch_size: number of documents per batch
+        :return: iterator of list of dictionary
+        """
+        cursor = self.find_many_cursor(
+            collection_name, query, select_fields=select_fields, batch_size=batch_size
+        )
+        return _iter_batches(cursor, batch_size)
+
+    def iter_aggregated(
+        self,
+        collection_name: str,
+        query: List[Dict[str, Any]],
+        batch_size: int = MONGO_CURSOR_BATCH_SIZE,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate aggregate function result from our database in fixed size batches
+        :param collection_name: string collection name
+        :param query: list of pipeline stages
+        :param batch_size: number of documents per batch
+        :return: iterator of list of dictionary
+        """
+        cursor = self.__db[collection_name].aggregate(query, batchSize=batch_size)
+        return _iter_batches(cursor, batch_size)
+
     @measure_it
     def find_many_without_cache(
         self,
         collection_name: str,
         query: Dict[str, Any],
-        select_fields: Dict[str, Any] = {},
+        select_fields: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
         """Find data from our database for specified filter
         :param collection_name: string collection name
@@ -469,26 +1003,58 @@ class MongoDatabase:
         :return: List of dictionary
         """
         try:
-            if len(select_fields) > 0:
-                select_fields["_id"] = 0
-            result = [i for i in self.__db[collection_name].find(query, select_fields)]
-            Logging.info(self._message_log.format(len(result)))
+            projection = _projection(select_fields)
+            result = list(
+                self.__db[collection_name]
+                .find(query, projection)
+                .max_time_ms(MONGO_TIMEOUT_MS)
+                .batch_size(MONGO_CURSOR_BATCH_SIZE)
+            )
+            _log_info(MESSAGE_LOG, len(result))
             return result
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
             return []
 
-    def insert_many(self, collection_name: str, data: List[Dict[str, Any]]):
-        """Insert bulking data to our database
+    def insert_many(
+        self,
+        collection_name: str,
+        data: List[Dict[str, Any]],
+        chunk_size: int = MONGO_BULK_CHUNK,
+        max_workers: int = MONGO_INSERT_WORKERS,
+        bypass_document_validation: bool = False,
+    ) -> int:
+        """Insert bulking data to our database, chunks are encoded and sent in parallel
         :param data: list of dictionary data
         :param collection_name: string collection name
-        :return: None
+        :param chunk_size: number of documents per insert command
+        :param max_workers: number of chunks in flight
+        :param bypass_document_validation: skip collection schema validation, needs
+            bypassDocumentValidation privilege which readWrite role does not have
+        :return: number of inserted documents
         """
+        coll = self.__db[collection_name]
+        chunks = [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+        inserted = 0
         try:
-            self.__db[collection_name].insert_many(data, ordered=False)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        coll.insert_many,
+                        chunk,
+                        ordered=False,
+                        bypass_document_validation=bypass_document_validation,
+                    )
+                    for chunk in chunks
+                ]
+                for future in as_completed(futures):
+                    inserted += len(future.result().inserted_ids)
             Logging.info("All the Data has been Exported to Mongo DB Server .... ")
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
+        finally:
+            self.invalidate(collection_name)
+        return inserted
 
     def delete_many(self, collection_name: str, query: Dict[str, Any]):
         """Delete many data from our database for specified filter
@@ -498,6 +1064,7 @@ class MongoDatabase:
         """
         try:
             cursor = self.__db[collection_name].delete_many(query)
-            Logging.info("Records effected = {}".format(cursor.deleted_count))
+            self.invalidate(collection_name)
+            _log_info("Records effected = {}", cursor.deleted_count)
         except ExecutionTimeout:
             Logging.info(MONGO_MESSAGE_TIMEOUT)
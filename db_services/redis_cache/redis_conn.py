@@ -1,16 +1,90 @@
-import ast
 import base64
 import gzip
-import json
-from copy import deepcopy
+import logging
+import socket
+import threading
+from functools import lru_cache
 from typing import AnyStr, ByteString, Union, Dict, Any, List, Iterator, Tuple
 from urllib.parse import urlparse
 
+import orjson
 import redis
+import zstandard
 
 from rplus_utils import Logging
 from rplus_utils.common.config import config
 
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 1
+# accept the same input as json.dumps did, non string keys and numpy values
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+# set to "gzip" while some readers still only understand gzip payload
+REDIS_COMPRESSION = getattr(config, "redis_compression", "zstd")
+REDIS_MAX_CONNECTIONS = getattr(config, "redis_max_connections", 32)
+REDIS_SOCKET_TIMEOUT = getattr(config, "redis_socket_timeout", 10)
+REDIS_CONNECT_TIMEOUT = getattr(config, "redis_connect_timeout", 5)
+REDIS_HEALTH_CHECK_INTERVAL = getattr(config, "redis_health_check_interval", 30)
+
+# TCP_KEEPIDLE is not available on every platform
+KEEPALIVE_OPTIONS = (
+    {socket.TCP_KEEPIDLE: 30} if hasattr(socket, "TCP_KEEPIDLE") else {}
+)
+
+# one pool per redis server and credential, shared by every connection object
+_POOL_CACHE: Dict[Tuple[Any, ...], redis.ConnectionPool] = {}
+_POOL_CACHE_LOCK = threading.Lock()
+
+# zstd contexts are not thread safe, keep one set per thread
+_zstd_local = threading.local()
+
+
+@lru_cache(maxsize=1 << 17)
+def _b64key(key: str) -> bytes:
+    """Base64 encoded redis key, cached since the same keys are used over and over
+    :param key: string plain key
+    :return: bytes base 64 key
+    """
+    return base64.b64encode(key.encode("ascii"))
+
+
+# set expire only when the key is created by this incr
+INCR_EXPIRE_SCRIPT = """
+local v = redis.call('INCR', KEYS[1])
+if v == 1 then redis.call('EXPIRE', KEYS[1], ARGV[1]) end
+return v
+"""
+
+
+def _compress(data: bytes, level: int = ZSTD_LEVEL) -> bytes:
+    """Compress bytes with zstd frame, or gzip level 1 when REDIS_COMPRESSION is gzip
+    :param data: bytes data
+    :param level: zstd level, 1 - 5 is fast enough for real time path
+    :return: compressed bytes
+    """
+    if REDIS_COMPRESSION == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL)
+    compressors = getattr(_zstd_local, "compressors", None)
+    if compressors is None:
+        compressors = _zstd_local.compressors = {}
+    cctx = compressors.get(level)
+    if cctx is None:
+        cctx = compressors[level] = zstandard.ZstdCompressor(level=level)
+    return cctx.compress(data)
+
+
+def _decompress(data: bytes) -> bytes:
+    """Decompress zstd frame, value without zstd magic is legacy gzip payload
+    :param data: compressed bytes
+    :return: bytes data
+    """
+    if not data.startswith(ZSTD_MAGIC):
+        return gzip.decompress(data)
+    dctx = getattr(_zstd_local, "decompressor", None)
+    if dctx is None:
+        dctx = _zstd_local.decompressor = zstandard.ZstdDecompressor()
+    return dctx.decompress(data)
+
 
 class RedisConnection:
     def __init__(
@@ -39,14 +113,22 @@ class RedisConnection:
             credential["username"] = self.username
             credential["password"] = self.password
 
-        self.pool = redis.ConnectionPool(**credential)
-        self.conn = redis.StrictRedis(
-            connection_pool=self.pool,
-            max_connections=10,
-            retry_on_timeout=True,
-            socket_timeout=10_0000,
-            socket_connect_timeout=10_0000,
-        )
+        pool_key = tuple(sorted(credential.items()))
+        with _POOL_CACHE_LOCK:
+            if pool_key not in _POOL_CACHE:
+                _POOL_CACHE[pool_key] = redis.ConnectionPool(
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    socket_keepalive=True,
+                    socket_keepalive_options=KEEPALIVE_OPTIONS,
+                    socket_timeout=REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+                    health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+                    retry_on_timeout=True,
+                    **credential,
+                )
+            self.pool = _POOL_CACHE[pool_key]
+        self.conn = redis.Redis(connection_pool=self.pool)
+        self._incr_expire = None
 
     def encode_string(self, text: str) -> str:
         """Base64 encode string from plain text
@@ -142,15 +224,17 @@ class RedisConnection:
         return cls(p.hostname, p.port, int(p.path[1:]), p.username, p.password, uri)
 
     def delete(self, keys: List[str]) -> int:
-        """Delete records in redis based on specified keys
+        """Delete records in redis based on specified keys, keys are unlinked in chunks
+        so memory is reclaimed in background by redis
         :param keys: string key
-        :return: boolean result
+        :return: number of deleted keys
         """
-        cnt = 0
-        for key in keys:
-            self.conn.delete(key)
-            cnt += 1
-        return cnt
+        if not keys:
+            return 0
+        p = self.conn.pipeline(transaction=False)
+        for chunk_keys in RedisConnection.chunk_array_keys(list(keys)):
+            p.unlink(*chunk_keys)
+        return sum(p.execute())
 
     def scan_iter(self, key: str) -> Iterator[Union[Union[str, bytes], Any]]:
         """Scan all redis database
@@ -159,22 +243,23 @@ class RedisConnection:
         """
         return self.conn.scan_iter(key)
 
-    def generate_sequence_number(self, key: str) -> str:
-        """Generate sequence number based on specified key
+    def generate_sequence_number(self, key: str, ttl: int = 0) -> str:
+        """Generate sequence number based on specified key, the increment is atomic
+        so concurrent workers never get the same number
             example:
                 1 -> will return as 000001
                 2 -> will return as 000002
         :param key: string key name
+        :param ttl: expire the sequence after ttl seconds from its creation, 0 never expire
         :return: string sequence number
         """
-        last_sequence = RedisConnection.get(key)
-        if last_sequence is None:
-            init_number = 1
-            self.set(key, init_number, ttl=0)
-            return str(init_number).zfill(10)
-
-        self.incr(key)
-        seq = RedisConnection.get(key)
+        if ttl > 0:
+            if self._incr_expire is None:
+                self._incr_expire = self.conn.register_script(INCR_EXPIRE_SCRIPT)
+            seq = self._incr_expire(keys=[_b64key(key)], args=[ttl])
+        else:
+            # incr create missing key with 1
+            seq = self.incr(key)
         return str(seq).zfill(10)
 
     def get(self, key: str) -> Union[ByteString, AnyStr, int, float, None, bytes]:
@@ -182,10 +267,10 @@ class RedisConnection:
         :param key: string key
         :return: it can be string bytes string, int or float
         """
-        hash_key = self.encode_string(key)
+        hash_key = _b64key(key)
         v = self.conn.get(hash_key)
         # if any value from it then decode to utf 8, cause default data type is bytes
-        if v is not None and len(v) > 0:
+        if v:
             return v.decode("utf-8")
 
         return None
@@ -194,33 +279,39 @@ class RedisConnection:
         self,
         key: str,
     ) -> Union[List[Dict[str, Any]], List[str], List[float], List[int]]:
-        """Get data from redis for specified keys
-        :param key: string key
-        :return: boolean (true, false)
+        """Get data from redis for specified keys, values are read with chunked mget
+        :param key: string key pattern
+        :return: list of json decoded values
         """
         tmp = []
-        for k in self.conn.keys(key):
-            if k is not None and len(k) > 0:
-                tmp.append(json.loads(self.conn.get(k.decode("utf-8")).decode("utf-8")))
+        # scan can return a key more than once, dict keep the first one in order
+        all_keys = list(dict.fromkeys(self.conn.scan_iter(match=key, count=1000)))
+        for chunk_keys in RedisConnection.chunk_array_keys(all_keys):
+            tmp.extend(orjson.loads(v) for v in self.conn.mget(chunk_keys) if v)
         return tmp
 
     def get_plain_key(
         self,
         key: str,
         compression: bool = True,
-        decode: bool = True
-    ) -> Union[ByteString, AnyStr, int, float, None]:
+        decode: bool = True,
+        loads: bool = False,
+    ) -> Union[ByteString, AnyStr, int, float, None, Any]:
         """Get value from specified key
         :param decode: it can be True or False
         :param key: string key
         :param compression: compression method
+        :param loads: parse json value from bytes directly, skip the utf 8 decode
         :return: it can be string bytes string, int or float
         """
         v = self.conn.get(key)
         # if any value from it then decode to utf 8, cause default data type is bytes
-        if v is not None and len(v) > 0:
+        if v:
             if compression:
-                return gzip.decompress(v).decode("utf-8")
+                v = _decompress(v)
+                return orjson.loads(v) if loads else v.decode("utf-8")
+            if loads:
+                return orjson.loads(v)
             if decode:
                 return v.decode("utf-8")
             return v
@@ -231,25 +322,30 @@ class RedisConnection:
         data: Dict[str, Any],
         ttl: int = 60 * 10,
         compression: bool = True,
+        compression_level: int = ZSTD_LEVEL,
     ) -> bool:
         """Save data to redis using multiple keys
         :param data: dictionary data with already assign key and value
-        :param ttl: default value for time to live
+        :param ttl: time to live in seconds, 0 never expire
         :param compression: compression method to used
+        :param compression_level: zstd level, use 1 for latency critical path
         :return: boolean (true, false)
         """
-
+        records = data
         if compression is True:
-            records = dict()
-            for k, v in data.items():
-                records[k] = gzip.compress(json.dumps(v).encode("utf-8"))
-
-            return self.conn.mset(records)
+            records = {
+                k: _compress(orjson.dumps(v, option=JSON_OPTIONS), compression_level)
+                for k, v in data.items()
+            }
 
         if ttl == 0:
-            return self.conn.mset(data)
+            return self.conn.mset(records)
 
-        return self.conn.mset(data)
+        # mset has no expire option, pipelined set ex is still one round trip
+        p = self.conn.pipeline(transaction=False)
+        for k, v in records.items():
+            p.set(k, v, ex=ttl)
+        return all(p.execute())
 
     def set_plain_key(
         self,
@@ -257,23 +353,20 @@ class RedisConnection:
         value: Union[ByteString, AnyStr, int, float],
         ttl: int = 60 * 10,
         compression: bool = True,
+        compression_level: int = ZSTD_LEVEL,
     ) -> bool:
         """Save data to redis by specified keys
         :param key: string key
         :param value: it can be bytes string, string, int or float
-        :param ttl: default value for time to live
+        :param ttl: time to live in seconds, 0 never expire
         :param compression: compression method to used
+        :param compression_level: zstd level, use 1 for latency critical path
         :return: boolean (true, false)
         """
         if compression is True:
-            return self.conn.set(
-                key, gzip.compress(value.encode("utf-8")), keepttl=False
-            )
-
-        if ttl == 0:
-            return self.conn.set(key, value, keepttl=False)
+            value = _compress(value.encode("utf-8"), compression_level)
 
-        return self.conn.set(key, value, keepttl=False)
+        return self.conn.set(key, value, ex=ttl or None)
 
     def set(
         self,
@@ -284,26 +377,23 @@ class RedisConnection:
         """Save data to redis by specified keys
         :param key: string key
         :param value: it can be bytes string, string, int or float
-        :param ttl: default value for time to live
+        :param ttl: time to live in seconds, 0 never expire
         :return: boolean (true, false)
         """
-        hash_key = self.encode_string(key)
-        if ttl == 0:
-            return self.conn.set(hash_key, value, keepttl=False)
-
-        return self.conn.set(hash_key, value, keepttl=False)
+        return self.conn.set(_b64key(key), value, ex=ttl or None)
 
     def incr(
         self,
         key: str,
     ) -> int:
-        """Increment value in specified keysredis_cache.py
+        """Increment value in specified keys, missing key start from 0
         :param key: string key
-        :return: boolean (true, false)
+        :return: value after increment, no further get is needed
         """
-        hash_key = self.encode_string(key)
+        hash_key = _b64key(key)
         return self.conn.incr(hash_key)
 
+    @staticmethod
     def chunk_array_keys(
         keys: List[str],
         chunk_size: int = 1000,
@@ -316,40 +406,42 @@ class RedisConnection:
         return [keys[i : i + chunk_size] for i in range(0, len(keys), chunk_size)]
 
     def fetch_all_keys(self, master_key) -> List[str]:
-        """Fetch all keys only from redis
+        """Fetch all keys only from redis, scanned in batches so redis is not blocked
+        :param master_key: string key pattern
         :return: list of all keys in redis
         """
-        # get all keys
-        keys = deepcopy(self.conn.keys(master_key))
-        # close connection
-        return keys
+        # scan can return a key more than once, dict keep the first one in order
+        return list(dict.fromkeys(self.conn.scan_iter(match=master_key, count=5000)))
 
     def fetch_value_from_keys(
         self,
         keys: List[str],
     ) -> Tuple[List[str], List[Any]]:
-        """Fetch value from keys
+        """Fetch value from keys, one round trip per chunk of keys
+        json values are parsed, hash values are returned as dictionary
         :param keys: list of keys
+        :return: keys and their values in the same order
         """
-        q = []
+        values = []
         for chunk_keys in RedisConnection.chunk_array_keys(keys):
-            n = len(chunk_keys)
-            Logging.info(f"fetch value from : {n} keys")
-            # setup pipeline
-            p = self.conn.pipeline()
-            # get value from keys
-            try:
-                _ = [p.hgetall(key) for key in keys]
-                # execute pipeline
-                q += [result for result in p.execute()]
-            except Exception as e:
-                _ = [p.get(key) for key in chunk_keys]
-                # execute pipeline
-                q += [result.decode("utf-8") for result in p.execute()]
-            len_q = len(q)
-            # close connection
-        q = [i.replace("null", "None") for i in q]
-        values = [ast.literal_eval(i) for i in q]
+            if Logging.is_enabled_for(logging.INFO):
+                Logging.info(f"fetch value from : {len(chunk_keys)} keys")
+            p = self.conn.pipeline(transaction=False)
+            for key in chunk_keys:
+                p.get(key)
+            results = p.execute(raise_on_error=False)
+            # get fails with WRONGTYPE for hash keys, only those are fetched again
+            hash_idx = [i for i, v in enumerate(results) if isinstance(v, redis.ResponseError)]
+            if hash_idx:
+                for i in hash_idx:
+                    p.hgetall(chunk_keys[i])
+                for i, v in zip(hash_idx, p.execute()):
+                    results[i] = {
+                        f.decode("utf-8"): val.decode("utf-8") for f, val in v.items()
+                    }
+            values += [
+                orjson.loads(v) if isinstance(v, bytes) else v for v in results
+            ]
         return keys, values
 
     def fetch_master_key_values(
@@ -360,9 +452,10 @@ class RedisConnection:
         return self.fetch_value_from_keys(all_keys)
 
     @classmethod
+    @lru_cache(maxsize=None)
     def new_rplus_redis_cluster(cls):
         """Please do not create any global variable, put inside class
-        use if only needed
+        use if only needed, the same object is returned on every call
         :return:
         """
         return cls(
@@ -381,9 +474,10 @@ class RedisConnection:
         )
 
     @classmethod
+    @lru_cache(maxsize=None)
     def new_rplus_redis_content(cls):
         """Please do not create any global variable, put inside class
-        use if only needed
+        use if only needed, the same object is returned on every call
         :return:
         """
         return cls(
@@ -402,9 +496,10 @@ class RedisConnection:
         )
 
     @classmethod
+    @lru_cache(maxsize=None)
     def new_aiml_redis_reader(cls):
         """Please do not create any global variable, put inside class
-        use if only needed
+        use if only needed, the same object is returned on every call
         :return:
         """
         return cls(
@@ -423,9 +518,10 @@ class RedisConnection:
         )
 
     @classmethod
+    @lru_cache(maxsize=None)
     def new_aiml_redis_writer(cls):
         """Please do not create any global variable, put inside class
-        use if only needed
+        use if only needed, the same object is returned on every call
         :return:
         """
         return cls(
@@ -444,9 +540,10 @@ class RedisConnection:
         )
 
     @classmethod
+    @lru_cache(maxsize=None)
     def new_rce_redis_cluster(cls):
         """Please do not create any global variable, put inside class
-        use if only needed
+        use if only needed, the same object is returned on every call
         :return:
         """
         return cls(
@@ -465,9 +562,10 @@ class RedisConnection:
         )
 
     @classmethod
+    @lru_cache(maxsize=None)
     def new_rce_redis_writer(cls):
         """Please do not create any global variable, put inside class
-        use if only needed
+        use if only needed, the same object is returned on every call
         :return:
         """
         return cls(
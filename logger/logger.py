@@ -12,55 +12,36 @@ logging.basicConfig(
 logging.root.setLevel(logging.INFO)
 
 
-class Logging:
-    @staticmethod
-    def get_logger():
-        return logging
+_LOG = logging.getLogger("rplus")
 
-    @staticmethod
-    def formatting_message(msg: Any) -> Dict[str, Any]:
-        """formatting message to get better logs
-        :param msg: message that want to print
-        :return: dictionary message
-        """
-        return msg
 
-    @staticmethod
-    def info(message: Any):
-        """Print logging info message
-        :param message: any message
-        :return: None
-        """
-        logging.info(Logging.formatting_message(message))
+class Logging:
+    """Logging methods are bound to rplus logger directly, so every log line
+    skip the wrapper function calls, the message is passed as is
+    """
 
-    @staticmethod
-    def debug(message: Any):
-        """Print logging debug message
-        :param message: any message
-        :return: None
-        """
-        logging.debug(Logging.formatting_message(message))
+    info = staticmethod(_LOG.info)
+    debug = staticmethod(_LOG.debug)
+    error = staticmethod(_LOG.error)
+    warning = staticmethod(_LOG.warning)
+    exception = staticmethod(_LOG.exception)
 
     @staticmethod
-    def error(message: Any):
-        """Print logging error message
-        :param message: any message
-        :return: None
-        """
-        logging.error(Logging.formatting_message(message))
+    def get_logger():
+        return logging
 
     @staticmethod
-    def warning(message: Any):
-        """Print logging warning message
-        :param message: any message
-        :return: None
+    def is_enabled_for(level: int) -> bool:
+        """Check if message with specified level will be printed
+        :param level: logging level eg: logging.INFO
+        :return: boolean (true, false)
         """
-        logging.warning(Logging.formatting_message(message))
+        return _LOG.isEnabledFor(level)
 
     @staticmethod
-    def exception(message: Any):
-        """Print logging exception() message
-        :param message: any message
-        :return: None
+    def formatting_message(msg: Any) -> Dict[str, Any]:
+        """formatting message to get better logs, kept for existing callers
+        :param msg: message that want to print
+        :return: dictionary message
         """
-        logging.exception(Logging.formatting_message(message))
+        return msg
@@ -1,26 +1,32 @@
-import json
-
+import orjson
 from pandas import DataFrame
 
 l = [1, 2, 3, 4]
-# save list as json with name as test
-with open("test", "w") as fp:
-    json.dump(l, fp)
+# save list as json with name as test, orjson writes bytes directly
+with open("test", "wb") as fp:
+    fp.write(orjson.dumps(l))
 
 # # load json as list
-with open("test", "r") as fp:
-    b = json.load(fp)
+with open("test", "rb") as fp:
+    b = orjson.loads(fp.read())
 
 
-# convert class model output to df
-user = DataFrame([o.__dict__ for o in data])
+# convert class model output to df, built column by column instead of one dict per row
+if data:
+    slots = getattr(data[0], "__slots__", None)
+    # a single slot can be declared as plain string
+    columns = (slots,) if isinstance(slots, str) else tuple(slots or vars(data[0]))
+    user = DataFrame({c: [getattr(o, c) for o in data] for c in columns})
+else:
+    user = DataFrame()
 
 
 # save dictionary
 import pickle
 
+# protocol 5 frames large bytes and numpy buffers without extra copies
 with open('saved_dictionary.pkl', 'wb') as f:
-    pickle.dump(dictionary, f)
+    pickle.Pickler(f, protocol=5).dump(dictionary)
 
 with open('saved_dictionary.pkl', 'rb') as f:
     loaded_dict = pickle.load(f)
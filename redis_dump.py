@@ -1,21 +1,29 @@
-import json
-
+import orjson
 from pandas import DataFrame
 
+PIPELINE_SIZE = 1000
+
 
 def dump_data_redis(data: DataFrame, redis_uri):
     """
     Function to update user-cluster relations in
-    redis cache
+    redis cache, records are sent in pipelines of PIPELINE_SIZE sets
     :param data: Dataframe object pandas
     :param redis_uri: redis uri
     """
-    data_dict = data.to_dict(orient='records')
+    columns = [c for c in data.columns if c != CUSTOMER_ID]
     cls = Redis.from_uri(redis_uri)
-    for record in data_dict:
-        key = "user_information:{}".format(record[CUSTOMER_ID])
-        record.pop(CUSTOMER_ID, None)
-        cls.set(key, json.dumps(record))
+    pipe = cls.conn.pipeline(transaction=False)
+    rows = data[[CUSTOMER_ID] + columns].itertuples(index=False, name=None)
+    for i, (customer_id, *values) in enumerate(rows, 1):
+        key = cls.encode_string("user_information:{}".format(customer_id))
+        pipe.set(
+            key,
+            orjson.dumps(dict(zip(columns, values)), option=orjson.OPT_SERIALIZE_NUMPY),
+        )
+        if i % PIPELINE_SIZE == 0:
+            pipe.execute()
+    pipe.execute()
     return True
 
 if __name__ == '__main__':
@@ -1,85 +1,127 @@
-import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
+import pyarrow.csv as pv
+from requests.adapters import HTTPAdapter
+from selectolax.parser import HTMLParser
+from urllib3.util.retry import Retry
+
+BASE_URL = 'https://www.imdb.com/search/title/?country_of_origin=ID'
+MOVIES_PER_PAGE = 50
+MAX_WORKERS = 16
+DIRECTOR_LABELS = frozenset(['Director:', 'Directors:'])
+STAR_LABELS = frozenset(['Stars:', 'Star:'])
+SEPARATORS = frozenset(['', ',', '|'])
+
+_local = threading.local()
+
+
+def _session():
+    """Get requests session of current thread, so connections are reused across pages"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        retry = Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _local.session = session
+    return session
+
+
+def _clean_credits(nodes):
+    """Clean text of star director line and find first director and star label in one pass
+    :param nodes: child nodes of star director line, text nodes included
+    :return: tuple of cleaned text, director index and star index, None when not found
+    """
+    data_cleaned = []
+    director_index = None
+    stars_index = None
+    for node in nodes:
+        element = node.text().strip()
+        if element in SEPARATORS:
+            continue
+        if director_index is None and element in DIRECTOR_LABELS:
+            director_index = len(data_cleaned)
+        elif stars_index is None and element in STAR_LABELS:
+            stars_index = len(data_cleaned)
+        data_cleaned.append(element)
+    return data_cleaned, director_index, stars_index
+
+
+def _parse_movie(movie):
+    # Initialize movie details as empty strings
+    title = ''
+    year = ''
+    genre = ''
+    rating = ''
+    duration = ''
+    description = ''
+    stars = []
+    directors = []
+    if title_element := movie.css_first('h3 a'):
+        title = title_element.text().strip()
+
+    if year_element := movie.css_first('span.lister-item-year'):
+        year = year_element.text().strip('()')
+
+    if genre_element := movie.css_first('span.genre'):
+        genre = genre_element.text().strip()
+
+    if rating_element := movie.css_first('strong'):
+        rating = rating_element.text()
+
+    if duration_element := movie.css_first('span.runtime'):
+        duration = duration_element.text().strip(' min')
+
+    if description_element := movie.css('p.text-muted')[-1]:
+        description = description_element.text().strip()
+
+    if stars_directors_element := movie.css_first('p:not([class]), p[class=""]').css(
+            'a[href]'
+    ):
+        # text of tag and text nodes alike, so no markup is left to strip
+        star_director_list = stars_directors_element[0].parent.iter(include_text=True)
+        data_cleaned, director_index, stars_index = _clean_credits(star_director_list)
+
+        directors = data_cleaned[
+                    director_index + 1:stars_index] if director_index is not None and stars_index is not None else []
+        stars = data_cleaned[stars_index + 1:] if stars_index is not None else []
+
+    return {'Title': title, 'Year': year, 'Genre': genre, 'Rating': rating,
+            'Duration': duration, 'Description': description,
+            'Stars': stars, 'Directors': directors}
+
+
+def fetch_page(i, total_pages=None):
+    """Fetch and parse one search result page
+    :param i: page number start from 1
+    :param total_pages: total pages, only used for progress message
+    :return: list of movie dictionary
+    """
+    print(f"Fetching data of {i} of {total_pages}...")
+    start_index = (i - 1) * MOVIES_PER_PAGE
+    res = _session().get(f'{BASE_URL}&start={start_index}')
+    tree = HTMLParser(res.content)
+    movie_list = tree.css('div.lister-item.mode-advanced')
+    return [_parse_movie(movie) for movie in movie_list]
 
 
 def fetch_imdb_data():
-    movie_data = []
-    movies_per_page = 50
-    total_movies = 0
-    total_pages = 0
-
-    url = 'https://www.imdb.com/search/title/?country_of_origin=ID'
-    res = requests.get(url)
-    soup = BeautifulSoup(res.content, 'html.parser')
+    res = _session().get(BASE_URL)
+    tree = HTMLParser(res.content)
 
     # Extracting the total number of movies
-    count_text = soup.find('div', class_='desc').span.text
+    count_text = tree.css_first('div.desc span').text()
     total_movies = int(count_text.split()[2].replace(',', ''))
-    total_pages = (total_movies // movies_per_page) + 1
-
-    for i in range(1, total_pages + 1):
-        print(f"Fetching data of {i} of {total_pages}...")
-        start_index = (i - 1) * movies_per_page
-        url = f'https://www.imdb.com/search/title/?country_of_origin=ID&start={start_index}'
-        res = requests.get(url)
-        soup = BeautifulSoup(res.content, 'html.parser')
-        movie_list = soup.find_all('div', class_='lister-item mode-advanced')
-
-        for movie in movie_list:
-            # Initialize movie details as empty strings
-            title = ''
-            year = ''
-            genre = ''
-            rating = ''
-            duration = ''
-            description = ''
-            stars = []
-            directors = []
-            if title_element := movie.h3.a:
-                title = title_element.text.strip()
-
-            if year_element := movie.find('span', class_='lister-item-year'):
-                year = year_element.text.strip('()')
-
-            if genre_element := movie.find('span', class_='genre'):
-                genre = genre_element.text.strip()
-
-            if rating_element := movie.find('strong'):
-                rating = rating_element.text
-
-            if duration_element := movie.find('span', class_='runtime'):
-                duration = duration_element.text.strip(' min')
-
-            if description_element := movie.find_all('p', class_='text-muted')[
-                -1
-            ]:
-                description = description_element.text.strip()
-
-            if stars_directors_element := movie.find('p', class_='').find_all(
-                    'a', href=True
-            ):
-                star_director_list = stars_directors_element[0].parent.contents
-                data_cleaned = [re.sub('<.*?>', '', str(element)).strip()
-                                for element in star_director_list if str(element).strip()]
-                data_cleaned = [element for element in data_cleaned if element not in ['', ',', '|']]
-
-                director_index = next(
-                    (i for i, element in enumerate(data_cleaned) if element in ['Director:', 'Directors:']), None
-                )
-
-                stars_index = next(
-                    (i for i, element in enumerate(data_cleaned) if element in ['Stars:', 'Star:']), None
-                )
-
-                directors = data_cleaned[
-                            director_index + 1:stars_index] if director_index is not None and stars_index is not None else []
-                stars = data_cleaned[stars_index + 1:] if stars_index is not None else []
-
-            movie_data.append({'Title': title, 'Year': year, 'Genre': genre, 'Rating': rating,
-                               'Duration': duration, 'Description': description,
-                               'Stars': stars, 'Directors': directors})
+    total_pages = (total_movies // MOVIES_PER_PAGE) + 1
+
+    # pages are network bound, map keeps them in page order
+    with ThreadPoolExecutor(MAX_WORKERS) as ex:
+        pages = ex.map(lambda i: fetch_page(i, total_pages), range(1, total_pages + 1))
+        movie_data = [movie for page in pages for movie in page]
 
     pd.DataFrame(movie_data).to_csv("indonesian_movie_data_imdb.csv", index=False)
 
@@ -88,6 +130,16 @@ def fetch_imdb_data():
 
 # fetch_imdb_data()
 
-df = pd.read_csv("indonesian_movie_data_imdb.csv")
-df = df.drop_duplicates()
+# arrow parse with multiple threads, self_destruct free arrow buffers while converting
+# empty strings are read as null, same as NaN from pd.read_csv
+# table is not bound to a name, self_destruct leaves it unusable after conversion
+df = (
+    pv.read_csv(
+        "indonesian_movie_data_imdb.csv",
+        read_options=pv.ReadOptions(use_threads=True),
+        convert_options=pv.ConvertOptions(strings_can_be_null=True),
+    )
+    .to_pandas(self_destruct=True)
+    .drop_duplicates()
+)
 df